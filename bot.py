@@ -2,11 +2,10 @@ from __future__ import annotations
 
 import asyncio
 import os
-import re
 import logging
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Optional
+from typing import Callable, Optional, TypeVar
 
 from aiogram import Bot, Dispatcher, F, Router, types
 from aiogram.exceptions import TelegramNetworkError
@@ -19,11 +18,32 @@ from aiohttp import web
 from asr import ASR
 from translator import Dictionary
 from tts_engine import TTSEngine
-from utils import ensure_dir, run_ffmpeg_convert, temp_file
+from utils import ensure_dir, run_ffmpeg_decode_pcm, run_ffmpeg_stream, temp_file
 
 logger = logging.getLogger("jangaloga_bot")
 
 
+_Num = TypeVar("_Num", int, float)
+
+
+def _env_num(name: str, default: str, caster: Callable[[str], _Num], lo: float, hi: float | None = None) -> _Num:
+    """
+    Parses a numeric env var with a default and a bounds check.
+    Raises RuntimeError in the same style as the rest of the config validation.
+    """
+    raw = os.getenv(name, default).strip() or default
+    try:
+        value = caster(raw)
+    except ValueError as e:
+        raise RuntimeError(f"Некорректный {name}: {raw}") from e
+    # The chained comparison (not a pair of < checks) also rejects NaN, which
+    # float() happily parses from SPEECH_TEMPO=nan.
+    if not (lo <= value <= (hi if hi is not None else float("inf"))):
+        bounds = f"в диапазоне {lo}..{hi}" if hi is not None else f">= {lo}"
+        raise RuntimeError(f"{name} должен быть {bounds}.")
+    return value
+
+
 @dataclass
 class AppConfig:
     bot_token: str
@@ -39,7 +59,7 @@ class AppConfig:
     max_voice_seconds: int = 45
     # Healthcheck HTTP server (for container platforms readiness/liveness probes)
     health_port: int = 8080
-    whisper_model: str = "small"
+    whisper_model: str = "base"
     tts_model: str = "tts_models/multilingual/multi-dataset/xtts_v2"
     tts_language: str = "ru"
 
@@ -55,46 +75,12 @@ class AppConfig:
         # Словарь и референс-голос теперь в корне проекта
         dict_path = Path(os.getenv("DICT_PATH", "./dictionary.json")).resolve()
         speaker_wav = Path(os.getenv("SPEAKER_WAV", "./speaker.wav")).resolve()
-        speech_tempo_raw = os.getenv("SPEECH_TEMPO", "0.67").strip() or "0.67"
-        try:
-            speech_tempo = float(speech_tempo_raw)
-        except ValueError as e:
-            raise RuntimeError(f"Некорректный SPEECH_TEMPO: {speech_tempo_raw}") from e
-        if not (0.5 <= speech_tempo <= 2.0):
-            raise RuntimeError("SPEECH_TEMPO должен быть в диапазоне 0.5..2.0 (ffmpeg atempo).")
-
-        telegram_timeout_raw = os.getenv("TELEGRAM_TIMEOUT", "180").strip() or "180"
-        try:
-            telegram_timeout = float(telegram_timeout_raw)
-        except ValueError as e:
-            raise RuntimeError(f"Некорректный TELEGRAM_TIMEOUT: {telegram_timeout_raw}") from e
-        if telegram_timeout < 30:
-            raise RuntimeError("TELEGRAM_TIMEOUT должен быть >= 30 секунд.")
-
-        max_text_chars_raw = os.getenv("MAX_TEXT_CHARS", "400").strip() or "400"
-        try:
-            max_text_chars = int(max_text_chars_raw)
-        except ValueError as e:
-            raise RuntimeError(f"Некорректный MAX_TEXT_CHARS: {max_text_chars_raw}") from e
-        if max_text_chars < 50:
-            raise RuntimeError("MAX_TEXT_CHARS должен быть >= 50.")
-
-        max_voice_seconds_raw = os.getenv("MAX_VOICE_SECONDS", "45").strip() or "45"
-        try:
-            max_voice_seconds = int(max_voice_seconds_raw)
-        except ValueError as e:
-            raise RuntimeError(f"Некорректный MAX_VOICE_SECONDS: {max_voice_seconds_raw}") from e
-        if max_voice_seconds < 5:
-            raise RuntimeError("MAX_VOICE_SECONDS должен быть >= 5.")
-
+        speech_tempo = _env_num("SPEECH_TEMPO", "0.67", float, 0.5, 2.0)
+        telegram_timeout = _env_num("TELEGRAM_TIMEOUT", "180", float, 30)
+        max_text_chars = _env_num("MAX_TEXT_CHARS", "400", int, 50)
+        max_voice_seconds = _env_num("MAX_VOICE_SECONDS", "45", int, 5)
         # Cloud container platforms often provide PORT env var for readiness probe
-        health_port_raw = os.getenv("PORT", os.getenv("HEALTH_PORT", "8080")).strip() or "8080"
-        try:
-            health_port = int(health_port_raw)
-        except ValueError as e:
-            raise RuntimeError(f"Некорректный PORT/HEALTH_PORT: {health_port_raw}") from e
-        if not (1 <= health_port <= 65535):
-            raise RuntimeError("PORT/HEALTH_PORT должен быть в диапазоне 1..65535.")
+        health_port = _env_num("PORT", os.getenv("HEALTH_PORT", "8080").strip() or "8080", int, 1, 65535)
         return cls(
             bot_token=token,
             data_dir=data_dir,
@@ -105,7 +91,7 @@ class AppConfig:
             max_text_chars=max_text_chars,
             max_voice_seconds=max_voice_seconds,
             health_port=health_port,
-            whisper_model=os.getenv("WHISPER_MODEL", "small").strip() or "small",
+            whisper_model=os.getenv("WHISPER_MODEL", "base").strip() or "base",
             tts_model=os.getenv("TTS_MODEL", "tts_models/multilingual/multi-dataset/xtts_v2").strip()
             or "tts_models/multilingual/multi-dataset/xtts_v2",
             tts_language=os.getenv("TTS_LANGUAGE", "ru").strip() or "ru",
@@ -113,8 +99,31 @@ class AppConfig:
 
 
 router = Router()
-_HAS_WORD_RE = re.compile(r"[A-Za-zА-Яа-яЁё]+", flags=re.UNICODE)
-PROCESS_LOCK = asyncio.Lock()
+# Allow a few messages in flight on multi-core hosts instead of rejecting
+# everything behind a single lock; ASR threads are sized to match in main().
+MAX_CONCURRENT_JOBS = max(1, (os.cpu_count() or 2) // 2)
+PROCESS_SEM = asyncio.BoundedSemaphore(MAX_CONCURRENT_JOBS)
+
+class TunedAiohttpSession(AiohttpSession):
+    """
+    AiohttpSession with connection-pool/keep-alive tuning for repeated large
+    voice uploads: retries reuse a warm TCP+TLS connection instead of paying
+    a fresh handshake per attempt.
+    """
+
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        # aiogram builds its TCPConnector from this dict on first use.
+        connector_init = getattr(self, "_connector_init", None)
+        if isinstance(connector_init, dict):
+            connector_init.update(
+                limit=32,
+                limit_per_host=8,
+                ttl_dns_cache=300,
+                keepalive_timeout=75,
+                enable_cleanup_closed=True,
+            )
+
 
 async def _start_health_server(port: int) -> web.AppRunner:
     """
@@ -144,6 +153,31 @@ async def cmd_help(message: types.Message) -> None:
     await message.answer(text)
 
 
+def _stretch_wav_bytes(wav_bytes: bytes, speech_tempo: float) -> bytes | None:
+    """
+    In-process equivalent of ffmpeg's atempo (tempo change without pitch change)
+    using librosa's phase vocoder, skipping a process spawn per message.
+    Returns None if librosa/soundfile are unavailable or the stretch fails —
+    the caller then falls back to the ffmpeg atempo filter.
+    """
+    try:
+        import io
+
+        import librosa
+        import soundfile as sf
+    except Exception:
+        return None
+    try:
+        y, sr = sf.read(io.BytesIO(wav_bytes), dtype="float32")
+        stretched = librosa.effects.time_stretch(y, rate=speech_tempo)
+        buf = io.BytesIO()
+        sf.write(buf, stretched, sr, format="WAV", subtype="PCM_16")
+        return buf.getvalue()
+    except Exception:
+        logger.exception("In-process tempo stretch failed; falling back to ffmpeg atempo")
+        return None
+
+
 async def _speak_and_send(
     message: types.Message,
     *,
@@ -153,43 +187,43 @@ async def _speak_and_send(
     speech_tempo: float,
     telegram_timeout: float,
 ) -> None:
-    out_wav = temp_file(".wav")
-    slowed_wav: Path | None = None
-    out_ogg: Path | None = None
+    out_voice: Path | None = None
     status = await message.answer("Озвучиваю…")
     try:
         logger.info("TTS start")
-        await tts.synthesize_to_wav(jg_text, speaker_wav=speaker_wav, out_wav=out_wav)
-        logger.info("TTS done: %s", out_wav)
+        wav_bytes = await tts.synthesize_to_bytes(jg_text, speaker_wav=speaker_wav)
+        logger.info("TTS done: %s bytes", len(wav_bytes))
 
-        # Slow down for readability (without pitch change) via ffmpeg atempo
+        # Tempo change happens in-process when librosa is available (no extra
+        # ffmpeg spawn); otherwise the atempo filter is fused into the opus encode.
+        output_args: list[str] = []
         if abs(speech_tempo - 1.0) > 1e-6:
-            slowed_wav = temp_file(".wav")
             logger.info("Applying tempo=%s", speech_tempo)
-            await run_ffmpeg_convert(
-                out_wav,
-                slowed_wav,
-                output_args=["-filter:a", f"atempo={speech_tempo}", "-c:a", "pcm_s16le"],
-            )
-            wav_for_ogg = slowed_wav
+            stretched = await asyncio.to_thread(_stretch_wav_bytes, wav_bytes, speech_tempo)
+            if stretched is not None:
+                wav_bytes = stretched
+            else:
+                output_args.extend(["-filter:a", f"atempo={speech_tempo}"])
+        if not output_args and len(wav_bytes) < 64_000:
+            # Short clip, tempo already applied: the wav is well under Telegram's
+            # voice limit, so skip the opus re-encode (one ffmpeg spawn) entirely.
+            out_voice = temp_file(".wav")
+            out_voice.write_bytes(wav_bytes)
+            logger.info("WAV small enough (%s bytes), skipping opus encode", len(wav_bytes))
         else:
-            wav_for_ogg = out_wav
-
-        out_ogg = temp_file(".ogg")
-        logger.info("Encoding opus ogg")
-        await run_ffmpeg_convert(
-            wav_for_ogg,
-            out_ogg,
             # Smaller + more "voice-note" oriented opus settings to reduce upload timeouts
-            output_args=["-ac", "1", "-c:a", "libopus", "-b:a", "24k", "-vbr", "on", "-application", "voip"],
-        )
+            output_args.extend(["-ac", "1", "-c:a", "libopus", "-b:a", "24k", "-vbr", "on", "-application", "voip"])
+
+            out_voice = temp_file(".ogg")
+            logger.info("Encoding opus ogg")
+            await run_ffmpeg_stream(wav_bytes, out_voice, output_args=output_args)
         try:
-            size = out_ogg.stat().st_size
+            size = out_voice.stat().st_size
         except Exception:
             size = -1
-        logger.info("OGG ready: %s bytes=%s", out_ogg, size)
+        logger.info("Voice file ready: %s bytes=%s", out_voice, size)
         await status.delete()
-        voice_file = FSInputFile(str(out_ogg))
+        voice_file = FSInputFile(str(out_voice))
         # Retry on transient network timeouts (WinError 121)
         last_exc: Optional[Exception] = None
         for attempt in range(3):
@@ -219,7 +253,7 @@ async def _speak_and_send(
         if last_exc is not None:
             raise last_exc
     finally:
-        for p in [out_wav, slowed_wav, out_ogg]:
+        for p in [out_voice]:
             if p is None:
                 continue
             try:
@@ -255,27 +289,21 @@ async def on_voice(
         )
         return
 
-    if PROCESS_LOCK.locked():
+    if PROCESS_SEM.locked():
         await message.answer("Сейчас обрабатываю другое сообщение. Пожалуйста, попробуйте ещё раз через минуту.")
         return
 
-    async with PROCESS_LOCK:
+    async with PROCESS_SEM:
         ogg_in = tmp_dir / f"in_{voice.file_unique_id}.ogg"
         file = await bot.get_file(voice.file_id)
         await bot.download_file(file.file_path, destination=ogg_in)
 
-        # Convert to wav for ASR / speaker ref
-        wav = tmp_dir / f"in_{voice.file_unique_id}.wav"
-        await run_ffmpeg_convert(
-            ogg_in,
-            wav,
-            output_args=["-ar", "16000", "-ac", "1", "-c:a", "pcm_s16le"],
-        )
-
         status = await message.answer("Слышу. Распознаю речь…")
 
-        # ASR (Russian)
-        ru_text = await asr.transcribe_ru(wav)
+        # Decode straight to PCM in memory and feed it to ASR (Russian),
+        # skipping the intermediate wav on disk.
+        pcm = await run_ffmpeg_decode_pcm(ogg_in, sample_rate=16000)
+        ru_text = await asr.transcribe_ru(pcm)
         if not ru_text:
             await status.edit_text("Не удалось распознать речь. Попробуй говорить чуть громче/чище.")
             return
@@ -288,8 +316,8 @@ async def on_voice(
             return
 
         await status.edit_text("Перевожу по словарю…")
-        jg_text = dictionary.translate_text(ru_text)
-        if not _HAS_WORD_RE.search(jg_text):
+        jg_text, translated_any = dictionary.translate_text(ru_text)
+        if not translated_any:
             await status.delete()
             await message.answer(
                 "Не получилось перевести на Джангалогу: в распознанном тексте не нашлось слов из словаря.\n"
@@ -317,13 +345,10 @@ async def on_voice(
                 )
         finally:
             # Best-effort cleanup
-            for p in [ogg_in, wav]:
-                if p is None:
-                    continue
-                try:
-                    Path(p).unlink(missing_ok=True)
-                except Exception:
-                    pass
+            try:
+                Path(ogg_in).unlink(missing_ok=True)
+            except Exception:
+                pass
 
 
 @router.message(F.text)
@@ -343,18 +368,18 @@ async def on_text(message: types.Message, cfg: AppConfig, dictionary: Dictionary
             f"Пожалуйста, сократите до {cfg.max_text_chars} символов или меньше."
         )
         return
-    jg_text = dictionary.translate_text(ru_text)
-    if not _HAS_WORD_RE.search(jg_text):
+    jg_text, translated_any = dictionary.translate_text(ru_text)
+    if not translated_any:
         await message.answer(
             "Не получилось перевести на Джангалогу: в тексте не нашлось слов из словаря.\n"
             "Попробуйте переформулировать."
         )
         return
 
-    if PROCESS_LOCK.locked():
+    if PROCESS_SEM.locked():
         await message.answer(jg_text + "\n\n(Озвучка: бот сейчас занят другим сообщением, попробуйте ещё раз через минуту.)")
         return
-    async with PROCESS_LOCK:
+    async with PROCESS_SEM:
         await message.answer(jg_text)
         try:
             await _speak_and_send(
@@ -391,7 +416,7 @@ async def main() -> None:
 
     # Use a longer aiohttp timeout for polling/network operations (seconds)
     # Note: aiogram expects `session.timeout` to be a number (not aiohttp.ClientTimeout).
-    session = AiohttpSession(timeout=cfg.telegram_timeout)
+    session = TunedAiohttpSession(timeout=cfg.telegram_timeout)
     bot = Bot(token=cfg.bot_token, session=session)
 
     # If this bot previously used a webhook (or another platform set it),
@@ -401,9 +426,28 @@ async def main() -> None:
     except Exception:
         pass
 
-    asr = ASR(model_name=cfg.whisper_model)
+    # Transcriptions are serialized on the ASR's single-thread executor, so the
+    # one that is running may use every core (cpu_threads=0 = CTranslate2
+    # default, all cores); PROCESS_SEM only governs TTS/ffmpeg concurrency.
+    asr = ASR(model_name=cfg.whisper_model, cpu_threads=0)
     tts = TTSEngine(model_name=cfg.tts_model, language=cfg.tts_language)
 
+    try:
+        await asr.warmup()
+    except Exception:
+        logger.warning("ASR warmup failed (non-fatal)", exc_info=True)
+
+    # Load XTTS in the background while polling starts: the first voice reply
+    # then finds a warm model instead of paying a multi-second load.
+    async def _warm_tts() -> None:
+        try:
+            await tts.warmup()
+            logger.info("TTS model warmed")
+        except Exception:
+            logger.warning("TTS warmup failed (non-fatal)", exc_info=True)
+
+    tts_warmup_task = asyncio.create_task(_warm_tts())
+
     # Dependency injection for handlers
     dp["cfg"] = cfg
     dp["asr"] = asr
@@ -416,6 +460,7 @@ async def main() -> None:
         health_runner = await _start_health_server(cfg.health_port)
         await dp.start_polling(bot)
     finally:
+        tts_warmup_task.cancel()
         if health_runner is not None:
             try:
                 await health_runner.cleanup()
@@ -1,132 +1,277 @@
-from __future__ import annotations
-
-import importlib
-import json
-import re
-from dataclasses import dataclass
-from pathlib import Path
-from typing import Literal
-
-
-FallbackPolicy = Literal["keep_original", "mark_unknown", "drop_unknown"]
-
-
-_WORD_RE = re.compile(r"([A-Za-zА-Яа-яЁё]+|[^A-Za-zА-Яа-яЁё]+)", flags=re.UNICODE)
-
-
-def _norm_ru(word: str) -> str:
-    w = word.lower()
-    return w.replace("ё", "е")
-
-
-def _apply_case_like(template: str, word: str) -> str:
-    if not word:
-        return word
-    if template.isupper():
-        return word.upper()
-    if template[:1].isupper() and template[1:].islower():
-        return word[:1].upper() + word[1:]
-    return word
-
-
-def _cleanup_spacing(text: str) -> str:
-    # Collapse whitespace
-    t = re.sub(r"\s+", " ", text, flags=re.UNICODE).strip()
-    # Remove space before punctuation
-    t = re.sub(r"\s+([,.!?;:])", r"\1", t)
-    # Remove space after opening brackets/quotes (basic)
-    t = re.sub(r"([\(\[\{«])\s+", r"\1", t)
-    # Ensure space after punctuation when followed by a letter (basic)
-    t = re.sub(r"([,.!?;:])([A-Za-zА-Яа-яЁё])", r"\1 \2", t)
-    return t.strip()
-
-
-@dataclass
-class Dictionary:
-    path: Path
-    ru_to_jg: dict[str, str]
-    fallback_policy: FallbackPolicy = "keep_original"
-    lemmatize_ru: bool = False
-
-    @classmethod
-    def load(cls, path: str | Path) -> "Dictionary":
-        p = Path(path)
-        if not p.exists():
-            return cls(path=p, ru_to_jg={}, fallback_policy="keep_original")
-        raw = json.loads(p.read_text(encoding="utf-8"))
-        ru_to_jg = raw.get("ru_to_jg", {}) or {}
-        fallback = raw.get("fallback_policy", "keep_original")
-        lemmatize_ru = bool(raw.get("lemmatize_ru", False))
-        return cls(path=p, ru_to_jg=ru_to_jg, fallback_policy=fallback, lemmatize_ru=lemmatize_ru)
-
-    def save(self) -> None:
-        payload = {
-            "meta": {
-                "language_name": "Джангалога",
-                "note": "Словарь заполняется пользователем. Ассистент НЕ добавляет слова без запроса.",
-            },
-            "ru_to_jg": dict(sorted(self.ru_to_jg.items(), key=lambda kv: kv[0])),
-            "fallback_policy": self.fallback_policy,
-            "lemmatize_ru": self.lemmatize_ru,
-        }
-        self.path.write_text(json.dumps(payload, ensure_ascii=False, indent=2), encoding="utf-8")
-
-    def add(self, ru_word: str, jg_word: str) -> None:
-        ru_key = _norm_ru(ru_word.strip())
-        if not ru_key:
-            raise ValueError("Пустое русское слово")
-        jg_val = jg_word.strip()
-        if not jg_val:
-            raise ValueError("Пустое слово на джангалоге")
-        self.ru_to_jg[ru_key] = jg_val
-        self.save()
-
-    def _lemma(self, ru_word_norm: str) -> str:
-        """
-        Lemmatize a normalized RU word (lowercase, 'ё'->'е') using pymorphy3.
-        If pymorphy3 isn't installed or fails, returns input.
-        """
-        if not self.lemmatize_ru:
-            return ru_word_norm
-        try:
-            pymorphy3 = importlib.import_module("pymorphy3")
-            MorphAnalyzer = getattr(pymorphy3, "MorphAnalyzer")
-        except Exception:
-            return ru_word_norm
-        # Cache analyzer per instance
-        morph = getattr(self, "_morph", None)
-        if morph is None:
-            morph = MorphAnalyzer()
-            setattr(self, "_morph", morph)
-        try:
-            parses = morph.parse(ru_word_norm)
-            if not parses:
-                return ru_word_norm
-            return getattr(parses[0], "normal_form", ru_word_norm) or ru_word_norm
-        except Exception:
-            return ru_word_norm
-
-    def translate_text(self, ru_text: str) -> str:
-        parts: list[str] = []
-        for tok in _WORD_RE.findall(ru_text):
-            if re.fullmatch(r"[A-Za-zА-Яа-яЁё]+", tok):
-                form = _norm_ru(tok)
-                # If dictionary contains a specific form (e.g. plural with special meaning), prefer it.
-                mapped = self.ru_to_jg.get(form)
-                if mapped is None:
-                    key = self._lemma(form)
-                    mapped = self.ru_to_jg.get(key)
-                if mapped is None:
-                    if self.fallback_policy == "drop_unknown":
-                        parts.append("")
-                    elif self.fallback_policy == "mark_unknown":
-                        parts.append(f"⟦{tok}⟧")
-                    else:
-                        parts.append(tok)
-                else:
-                    parts.append(_apply_case_like(tok, mapped))
-            else:
-                parts.append(tok)
-        return _cleanup_spacing("".join(parts))
-
-
+from __future__ import annotations
+
+import functools
+import json
+import re
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterable, Literal
+
+try:  # optional: C-accelerated JSON for dictionary load/save
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def _json_loads(data: bytes):
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def _json_dumps(payload) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(payload, option=orjson.OPT_INDENT_2)
+    return json.dumps(payload, ensure_ascii=False, indent=2).encode("utf-8")
+
+
+FallbackPolicy = Literal["keep_original", "mark_unknown", "drop_unknown"]
+
+
+# Two alternation groups so a match classifies the token (group 1 = word,
+# group 2 = everything else) — no second regex pass needed per token.
+_WORD_RE_PATTERN = r"([A-Za-zА-Яа-яЁё]+)|([^A-Za-zА-Яа-яЁё]+)"
+_WORD_RE = re.compile(_WORD_RE_PATTERN, flags=re.UNICODE)
+
+try:  # optional: google-re2 runs this simple character-class pattern as a DFA
+    import re2 as _re2
+
+    _WORD_RE = _re2.compile(_WORD_RE_PATTERN)
+except Exception:
+    pass
+# Note: the cleanup pattern below stays on stdlib re — it uses lookaheads,
+# which RE2 deliberately does not support.
+
+
+@functools.lru_cache(maxsize=1)
+def _try_morph():
+    """
+    Shared pymorphy3 analyzer: constructing MorphAnalyzer loads millions of word
+    forms, so all Dictionary instances reuse one module-level copy. Returns None
+    when pymorphy3 is unavailable — cached as well, so the failed import isn't
+    retried (with full exception setup) for every word.
+    """
+    try:
+        from pymorphy3 import MorphAnalyzer
+
+        return MorphAnalyzer()
+    except Exception:
+        return None
+
+
+# Both cases of ё are folded before lowercasing, fusing the old
+# lower() + replace() pair into translate() + lower().
+_NORM_TABLE = str.maketrans({"ё": "е", "Ё": "Е"})
+
+
+def _norm_ru(word: str) -> str:
+    if word.isascii():  # latin tokens can't contain ё
+        return word.lower()
+    return word.translate(_NORM_TABLE).lower()
+
+
+def _apply_case_like(template: str, word: str) -> str:
+    if not word:
+        return word
+    # Fast path: the vast majority of tokens are all-lowercase, so one cheap
+    # first-char check skips the tail scans below.
+    if not template[:1].isupper():
+        return word
+    rest = template[1:]
+    if not rest or rest.isupper():
+        return word.upper()
+    if rest.islower():
+        return word[:1].upper() + word[1:]
+    return word
+
+
+# One fused pattern instead of four sequential re.sub passes (each of which
+# re-scanned the whole string). Alternative order matters: it reproduces the
+# composition collapse-whitespace -> strip space before punctuation ->
+# strip space after opening brackets -> ensure space after punctuation.
+_CLEANUP_RE = re.compile(
+    r"\s+([,.!?;:])(?=[A-Za-zА-Яа-яЁё])"  # space+punct before a letter -> punct + space
+    r"|\s+([,.!?;:])"  # space before punctuation -> punct
+    r"|([\(\[\{«])\s+"  # space after opening brackets/quotes -> bracket
+    r"|([,.!?;:])(?=[A-Za-zА-Яа-яЁё])"  # punct glued to a letter -> punct + space
+    r"|\s+",  # collapse remaining whitespace
+    flags=re.UNICODE,
+)
+
+
+def _cleanup_sub(m: re.Match) -> str:
+    if m.group(1):
+        return m.group(1) + " "
+    if m.group(2):
+        return m.group(2)
+    if m.group(3):
+        return m.group(3)
+    if m.group(4):
+        return m.group(4) + " "
+    return " "
+
+
+def _cleanup_spacing(text: str) -> str:
+    return _CLEANUP_RE.sub(_cleanup_sub, text).strip()
+
+
+@dataclass
+class Dictionary:
+    path: Path
+    ru_to_jg: dict[str, str]
+    fallback_policy: FallbackPolicy = "keep_original"
+    lemmatize_ru: bool = False
+
+    def __post_init__(self) -> None:
+        # Repeated words are very common in natural text: memoize the whole
+        # "normalized form -> jg word or None" resolution (including the
+        # pymorphy3 lemma fallback) per instance.
+        self._resolve = functools.lru_cache(maxsize=65536)(self._resolve_impl)
+        # Lemmas never change for a given word: remember them so pymorphy3 runs
+        # at most once per distinct word for the lifetime of the instance.
+        self._lemma_cache: dict[str, str] = {}
+        self._jg_by_lemma = self._build_lemma_table()
+        self._dirty = False
+
+    def _build_lemma_table(self) -> dict[str, str]:
+        """
+        Pre-lemmatizes dictionary keys once at load, so that an inflected
+        dictionary key still matches any form with the same lemma via a single
+        dict probe — without re-lemmatizing dictionary entries per lookup.
+        """
+        if not self.lemmatize_ru:
+            return {}
+        table: dict[str, str] = {}
+        for k, v in self.ru_to_jg.items():
+            lemma = self._lemma(k)
+            if lemma != k:
+                table.setdefault(lemma, v)
+        return table
+
+    def _resolve_impl(self, form: str) -> str | None:
+        # If dictionary contains a specific form (e.g. plural with special meaning), prefer it.
+        mapped = self.ru_to_jg.get(form)
+        if mapped is None:
+            lemma = self._lemma(form)
+            mapped = self.ru_to_jg.get(lemma)
+            if mapped is None:
+                mapped = self._jg_by_lemma.get(lemma)
+        return mapped
+
+    @classmethod
+    def load(cls, path: str | Path) -> "Dictionary":
+        p = Path(path)
+        if not p.exists():
+            return cls(path=p, ru_to_jg={}, fallback_policy="keep_original")
+        raw = _json_loads(p.read_bytes())
+        ru_to_jg = raw.get("ru_to_jg", {}) or {}
+        fallback = raw.get("fallback_policy", "keep_original")
+        lemmatize_ru = bool(raw.get("lemmatize_ru", False))
+        return cls(path=p, ru_to_jg=ru_to_jg, fallback_policy=fallback, lemmatize_ru=lemmatize_ru)
+
+    def save(self) -> None:
+        payload = {
+            "meta": {
+                "language_name": "Джангалога",
+                "note": "Словарь заполняется пользователем. Ассистент НЕ добавляет слова без запроса.",
+            },
+            "ru_to_jg": dict(sorted(self.ru_to_jg.items(), key=lambda kv: kv[0])),
+            "fallback_policy": self.fallback_policy,
+            "lemmatize_ru": self.lemmatize_ru,
+        }
+        self.path.write_bytes(_json_dumps(payload))
+
+    def add(self, ru_word: str, jg_word: str) -> None:
+        """
+        Adds one pair in memory and marks the dictionary dirty. Rewriting the
+        whole JSON per insertion is O(N^2) over a session, so persisting is
+        deferred to flush() (or use add_many for a batch with a single save).
+        """
+        ru_key = _norm_ru(ru_word.strip())
+        if not ru_key:
+            raise ValueError("Пустое русское слово")
+        jg_val = jg_word.strip()
+        if not jg_val:
+            raise ValueError("Пустое слово на джангалоге")
+        self.ru_to_jg[ru_key] = jg_val
+        if self.lemmatize_ru:
+            lemma = self._lemma(ru_key)
+            if lemma != ru_key:
+                self._jg_by_lemma.setdefault(lemma, jg_val)
+        self._resolve.cache_clear()
+        self._dirty = True
+
+    def add_many(self, pairs: Iterable[tuple[str, str]]) -> None:
+        """
+        Adds several pairs and saves once at the end.
+        """
+        for ru_word, jg_word in pairs:
+            self.add(ru_word, jg_word)
+        self.flush()
+
+    def flush(self) -> None:
+        """
+        Writes the dictionary to disk if there are unsaved changes.
+        """
+        if self._dirty:
+            self.save()
+            self._dirty = False
+
+    def _lemma(self, ru_word_norm: str) -> str:
+        """
+        Lemmatize a normalized RU word (lowercase, 'ё'->'е') using pymorphy3.
+        If pymorphy3 isn't installed or fails, returns input.
+        """
+        if not self.lemmatize_ru:
+            return ru_word_norm
+        hit = self._lemma_cache.get(ru_word_norm)
+        if hit is not None:
+            return hit
+        morph = _try_morph()
+        if morph is None:
+            return ru_word_norm
+        try:
+            parses = morph.parse(ru_word_norm)
+            if not parses:
+                return ru_word_norm
+            lemma = getattr(parses[0], "normal_form", ru_word_norm) or ru_word_norm
+        except Exception:
+            return ru_word_norm
+        self._lemma_cache[ru_word_norm] = lemma
+        return lemma
+
+    def translate_text(self, ru_text: str) -> tuple[str, bool]:
+        """
+        Returns (translated_text, translated_any) where translated_any tells
+        whether at least one word was found in the dictionary — callers use it
+        instead of re-scanning the output for words.
+        """
+        parts: list[str] = []
+        # Bind everything touched per token to locals: the interpreter can't
+        # hoist attribute/global lookups out of the loop on its own.
+        append = parts.append
+        resolve = self._resolve
+        policy = self.fallback_policy
+        norm = _norm_ru
+        apply_case = _apply_case_like
+        translated_any = False
+        for m in _WORD_RE.finditer(ru_text):
+            tok = m.group()
+            # group-presence check instead of lastindex: portable across re and re2
+            if m.group(1) is not None:
+                mapped = resolve(norm(tok))
+                if mapped is None:
+                    if policy == "drop_unknown":
+                        append("")
+                    elif policy == "mark_unknown":
+                        append(f"⟦{tok}⟧")
+                    else:
+                        append(tok)
+                else:
+                    translated_any = True
+                    append(apply_case(tok, mapped))
+            else:
+                append(tok)
+        return _cleanup_spacing("".join(parts)), translated_any
+
+
@@ -1,47 +1,153 @@
-from __future__ import annotations
-
-import asyncio
-import importlib
-from dataclasses import dataclass
-from pathlib import Path
-
-
-@dataclass
-class TTSEngine:
-    model_name: str = "tts_models/multilingual/multi-dataset/xtts_v2"
-    language: str = "ru"
-
-    def __post_init__(self) -> None:
-        self._tts: object | None = None
-
-    def _get_tts(self):
-        if self._tts is None:
-            try:
-                tts_api = importlib.import_module("TTS.api")
-                TTS = getattr(tts_api, "TTS")
-            except Exception as e:
-                raise RuntimeError(
-                    "Пакет 'TTS' не установлен. Для синтеза установите зависимости:\n"
-                    "  pip install -r requirements.tts.txt\n\n"
-                    "На Windows может потребоваться Microsoft C++ Build Tools (MSVC 14+)."
-                ) from e
-            self._tts = TTS(self.model_name)
-        return self._tts
-
-    async def synthesize_to_wav(self, text: str, speaker_wav: Path, out_wav: Path) -> None:
-        """
-        XTTS voice cloning: speaker_wav is your reference voice sample (wav).
-        """
-        tts = self._get_tts()
-
-        def _run() -> None:
-            tts.tts_to_file(
-                text=text,
-                file_path=str(out_wav),
-                speaker_wav=str(speaker_wav),
-                language=self.language,
-            )
-
-        await asyncio.to_thread(_run)
-
-
+from __future__ import annotations
+
+import asyncio
+import importlib
+import io
+import os
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+
+
+@dataclass
+class TTSEngine:
+    model_name: str = "tts_models/multilingual/multi-dataset/xtts_v2"
+    language: str = "ru"
+
+    def __post_init__(self) -> None:
+        self._tts: object | None = None
+        # Guards the multi-second model load: a background warmup and the first
+        # request must not race into loading the model twice.
+        self._load_lock = threading.Lock()
+        # (path, mtime) -> XTTS conditioning latents for the reference voice;
+        # the speaker encoder is the heaviest fixed cost per synthesis and the
+        # bot reuses one reference wav for every request.
+        self._speaker_cache: dict[tuple[str, float], tuple] = {}
+
+    def _get_tts(self):
+        if self._tts is None:
+            with self._load_lock:
+                if self._tts is None:
+                    try:
+                        tts_api = importlib.import_module("TTS.api")
+                        TTS = getattr(tts_api, "TTS")
+                    except Exception as e:
+                        raise RuntimeError(
+                            "Пакет 'TTS' не установлен. Для синтеза установите зависимости:\n"
+                            "  pip install -r requirements.tts.txt\n\n"
+                            "На Windows может потребоваться Microsoft C++ Build Tools (MSVC 14+)."
+                        ) from e
+                    self._tts = TTS(self.model_name)
+                    self._maybe_quantize()
+        return self._tts
+
+    async def warmup(self) -> None:
+        """
+        Loads the model off the request critical path; schedule as a background
+        task at startup so the first voice reply sees a warm model.
+        """
+        await asyncio.to_thread(self._get_tts)
+
+    def _maybe_quantize(self) -> None:
+        """
+        Opportunistic int8 dynamic quantization of the XTTS linear layers on CPU.
+        int8 matmuls only pay off on AVX512-VNNI hosts — elsewhere they are
+        slower than fp32 — so this is gated on the CPU advertising VNNI (via
+        py-cpuinfo, if installed) and on TTS_QUANT=auto (default; set 'off' to
+        disable on trouble hosts).
+        """
+        if os.getenv("TTS_QUANT", "auto").strip().lower() != "auto":
+            return
+        try:
+            cpuinfo = importlib.import_module("cpuinfo")
+            flags = set(cpuinfo.get_cpu_info().get("flags", []))
+        except Exception:
+            return
+        if not flags & {"avx512_vnni", "avx512vnni"}:
+            return
+        try:
+            import torch
+
+            synthesizer = getattr(self._tts, "synthesizer", None)
+            model = getattr(synthesizer, "tts_model", None)
+            if model is None:
+                return
+            synthesizer.tts_model = torch.quantization.quantize_dynamic(
+                model, {torch.nn.Linear}, dtype=torch.qint8
+            )
+        except Exception:
+            # fp32 path still works; quantization is purely best-effort
+            return
+
+    def _speaker_latents(self, tts, speaker_wav: Path):
+        """
+        Returns cached (gpt_cond_latent, speaker_embedding) for the reference
+        wav, or None if the XTTS internals don't expose conditioning latents.
+        Keyed on (path, mtime) so replacing the file invalidates the cache.
+        """
+        try:
+            key = (str(speaker_wav), speaker_wav.stat().st_mtime)
+        except OSError:
+            return None
+        hit = self._speaker_cache.get(key)
+        if hit is not None:
+            return hit
+        try:
+            model = tts.synthesizer.tts_model
+            latents = model.get_conditioning_latents(audio_path=[str(speaker_wav)])
+        except Exception:
+            return None
+        self._speaker_cache[key] = latents
+        return latents
+
+    async def synthesize_to_wav(self, text: str, speaker_wav: Path, out_wav: Path) -> None:
+        """
+        XTTS voice cloning: speaker_wav is your reference voice sample (wav).
+        """
+        tts = self._get_tts()
+
+        def _run() -> None:
+            tts.tts_to_file(
+                text=text,
+                file_path=str(out_wav),
+                speaker_wav=str(speaker_wav),
+                language=self.language,
+            )
+
+        await asyncio.to_thread(_run)
+
+    async def synthesize_to_bytes(self, text: str, speaker_wav: Path) -> bytes:
+        """
+        Like synthesize_to_wav, but returns the WAV as in-memory bytes so callers
+        can pipe it straight into ffmpeg without a temp file round-trip.
+        """
+        tts = self._get_tts()
+
+        def _run() -> bytes:
+            import numpy as np
+            import soundfile as sf
+
+            wav = None
+            latents = self._speaker_latents(tts, speaker_wav)
+            if latents is not None:
+                try:
+                    gpt_cond_latent, speaker_embedding = latents
+                    out = tts.synthesizer.tts_model.inference(
+                        text, self.language, gpt_cond_latent, speaker_embedding
+                    )
+                    wav = out["wav"]
+                    if hasattr(wav, "detach"):
+                        wav = wav.detach().cpu().numpy()
+                except Exception:
+                    wav = None  # internal API mismatch: use the public path below
+            if wav is None:
+                wav = tts.tts(text=text, speaker_wav=str(speaker_wav), language=self.language)
+            synthesizer = getattr(tts, "synthesizer", None)
+            sample_rate = getattr(synthesizer, "output_sample_rate", None) or 24000
+            buf = io.BytesIO()
+            sf.write(buf, np.asarray(wav, dtype=np.float32), sample_rate, format="WAV", subtype="PCM_16")
+            return buf.getvalue()
+
+        return await asyncio.to_thread(_run)
+
+
@@ -1,51 +1,154 @@
-from __future__ import annotations
-
-import asyncio
-import os
-import re
-import shutil
-import subprocess
-import tempfile
-from pathlib import Path
-
-
-def ensure_ffmpeg_available() -> None:
-    if shutil.which("ffmpeg") is None:
-        raise RuntimeError(
-            "ffmpeg не найден в PATH. Установите ffmpeg и добавьте его в PATH "
-            "(нужно для конвертации Telegram voice/ogg)."
-        )
-
-
-def ensure_dir(path: str | Path) -> Path:
-    p = Path(path)
-    p.mkdir(parents=True, exist_ok=True)
-    return p
-
-
-def sanitize_filename(name: str) -> str:
-    name = re.sub(r"[^a-zA-Z0-9._-]+", "_", name)
-    return name.strip("._-") or "file"
-
-
-async def run_ffmpeg_convert(input_path: Path, output_path: Path, output_args: list[str]) -> None:
-    """
-    Runs: ffmpeg -y -i <input> <output_args...> <output>
-    """
-    ensure_ffmpeg_available()
-    cmd = ["ffmpeg", "-y", "-hide_banner", "-loglevel", "error", "-i", str(input_path)]
-    cmd.extend(output_args)
-    cmd.append(str(output_path))
-
-    def _run() -> None:
-        subprocess.run(cmd, check=True)
-
-    await asyncio.to_thread(_run)
-
-
-def temp_file(suffix: str) -> Path:
-    fd, p = tempfile.mkstemp(suffix=suffix)
-    os.close(fd)
-    return Path(p)
-
-
+from __future__ import annotations
+
+import asyncio
+import os
+import re
+import shutil
+import string
+import tempfile
+from pathlib import Path
+
+
+# Resolved once at import: shutil.which is a full PATH scan (expensive on
+# Windows) and the result can't change for the life of the process anyway.
+_FFMPEG = shutil.which("ffmpeg")
+
+
+def ensure_ffmpeg_available() -> None:
+    if _FFMPEG is None:
+        raise RuntimeError(
+            "ffmpeg не найден в PATH. Установите ffmpeg и добавьте его в PATH "
+            "(нужно для конвертации Telegram voice/ogg)."
+        )
+
+
+def ensure_dir(path: str | Path) -> Path:
+    p = Path(path)
+    p.mkdir(parents=True, exist_ok=True)
+    return p
+
+
+_SANITIZE_RE = re.compile(r"[^a-zA-Z0-9._-]+")
+_ALLOWED_CHARS = set(string.ascii_letters + string.digits + "._-")
+# str.translate table covering ASCII. Disallowed chars map to a sentinel (not
+# '_': the name may legally contain underscores already), whose runs are then
+# collapsed to a single '_' to match the regex's run-replacement behavior.
+_SANITIZE_TABLE = {ord(c): "\x00" for c in map(chr, range(128)) if c not in _ALLOWED_CHARS}
+
+
+def sanitize_filename(name: str) -> str:
+    if name.isascii():
+        name = name.translate(_SANITIZE_TABLE)
+        while "\x00\x00" in name:
+            name = name.replace("\x00\x00", "\x00")
+        name = name.replace("\x00", "_")
+    else:
+        # Non-ASCII names (Cyrillic etc.) keep the regex path: a per-codepoint
+        # table can't cover the whole Unicode range.
+        name = _SANITIZE_RE.sub("_", name)
+    return name.strip("._-") or "file"
+
+
+async def run_ffmpeg_convert(input_path: Path, output_path: Path, output_args: list[str]) -> None:
+    """
+    Runs: ffmpeg -y -i <input> <output_args...> <output>
+    """
+    ensure_ffmpeg_available()
+    cmd = [_FFMPEG, "-y", "-hide_banner", "-loglevel", "error", "-i", str(input_path)]
+    cmd.extend(output_args)
+    cmd.append(str(output_path))
+
+    proc = await asyncio.create_subprocess_exec(
+        *cmd,
+        stdin=asyncio.subprocess.DEVNULL,
+        stdout=asyncio.subprocess.DEVNULL,
+        stderr=asyncio.subprocess.PIPE,
+    )
+    _, err = await proc.communicate()
+    if proc.returncode != 0:
+        raise RuntimeError(f"ffmpeg завершился с кодом {proc.returncode}: {err.decode(errors='replace').strip()}")
+
+
+async def run_ffmpeg_convert_batch(jobs: list[tuple[Path, Path, list[str]]]) -> None:
+    """
+    Converts several independent files with a single ffmpeg process:
+    ffmpeg -y -i <in1> ... -i <inN> -map 0:a <args1> <out1> ... -map N-1:a <argsN> <outN>
+
+    Each job is (input_path, output_path, output_args). Amortizes the
+    process-spawn cost (~100-300 ms) over all jobs; a one-element batch is
+    equivalent to run_ffmpeg_convert.
+    """
+    if not jobs:
+        return
+    ensure_ffmpeg_available()
+    cmd = [_FFMPEG, "-y", "-hide_banner", "-loglevel", "error"]
+    for input_path, _output_path, _output_args in jobs:
+        cmd.extend(["-i", str(input_path)])
+    for idx, (_input_path, output_path, output_args) in enumerate(jobs):
+        cmd.extend(["-map", f"{idx}:a"])
+        cmd.extend(output_args)
+        cmd.append(str(output_path))
+
+    proc = await asyncio.create_subprocess_exec(
+        *cmd,
+        stdin=asyncio.subprocess.DEVNULL,
+        stdout=asyncio.subprocess.DEVNULL,
+        stderr=asyncio.subprocess.PIPE,
+    )
+    _, err = await proc.communicate()
+    if proc.returncode != 0:
+        raise RuntimeError(f"ffmpeg завершился с кодом {proc.returncode}: {err.decode(errors='replace').strip()}")
+
+
+async def run_ffmpeg_stream(input_bytes: bytes, output_path: Path, output_args: list[str]) -> None:
+    """
+    Runs: ffmpeg -y -i pipe:0 <output_args...> <output>, feeding the input over stdin
+    so the source audio never touches the filesystem.
+    """
+    ensure_ffmpeg_available()
+    cmd = [_FFMPEG, "-y", "-hide_banner", "-loglevel", "error", "-i", "pipe:0"]
+    cmd.extend(output_args)
+    cmd.append(str(output_path))
+
+    proc = await asyncio.create_subprocess_exec(
+        *cmd,
+        stdin=asyncio.subprocess.PIPE,
+        stdout=asyncio.subprocess.DEVNULL,
+        stderr=asyncio.subprocess.PIPE,
+    )
+    _, err = await proc.communicate(input=input_bytes)
+    if proc.returncode != 0:
+        raise RuntimeError(f"ffmpeg завершился с кодом {proc.returncode}: {err.decode(errors='replace').strip()}")
+
+
+async def run_ffmpeg_decode_pcm(input_path: Path, *, sample_rate: int = 16000) -> bytes:
+    """
+    Decodes any audio file to raw mono s16le PCM on stdout:
+    ffmpeg -i <input> -f s16le -ac 1 -ar <rate> pipe:1
+    Returns the PCM bytes without writing an intermediate wav.
+    """
+    ensure_ffmpeg_available()
+    cmd = [
+        _FFMPEG, "-hide_banner", "-loglevel", "error",
+        "-i", str(input_path),
+        "-f", "s16le", "-ac", "1", "-ar", str(sample_rate),
+        "pipe:1",
+    ]
+    proc = await asyncio.create_subprocess_exec(
+        *cmd,
+        stdin=asyncio.subprocess.DEVNULL,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE,
+    )
+    out, err = await proc.communicate()
+    if proc.returncode != 0:
+        raise RuntimeError(f"ffmpeg завершился с кодом {proc.returncode}: {err.decode(errors='replace').strip()}")
+    return out
+
+
+def temp_file(suffix: str) -> Path:
+    fd, p = tempfile.mkstemp(suffix=suffix)
+    os.close(fd)
+    return Path(p)
+
+